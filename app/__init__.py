@@ -7,6 +7,9 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 import os
 from .config import Config
+from .json_provider import OrjsonProvider
+from .models.indexes import ensure_indexes
+from .services.cache import cache
 
 mongo = PyMongo()
 jwt = JWTManager()
@@ -20,6 +23,7 @@ def create_app():
 
     app = Flask(__name__, static_folder=frontend_folder, static_url_path="")
     app.config.from_object(Config)
+    app.json = OrjsonProvider(app)
 
     # Init extensions
     mongo.init_app(app)
@@ -27,6 +31,17 @@ def create_app():
     mail.init_app(app)
     CORS(app)
     limiter.init_app(app)
+    cache.init_app(app)
+
+    # Run once per deploy (see Procfile), not in every worker's boot path
+    @app.cli.command("create-indexes")
+    def create_indexes():
+        """Create the MongoDB indexes the API relies on."""
+        ensure_indexes(mongo.db, app.logger)
+
+    # Imported here since audit.py needs the mongo extension defined above
+    from .services.audit import audit_writer
+    audit_writer.init_app(app)
 
     # ── Serve frontend pages ──────────────────────────────
     @app.route("/")
@@ -7,7 +7,9 @@ class Config:
     MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/bankapp")
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "fallback-secret")
     PERMISSION_SECRET = os.getenv("PERMISSION_SECRET", "fallback-permission-secret")
+    ADMIN_SECRET = os.getenv("ADMIN_SECRET", "BANK_ADMIN_SECRET_2024")
     JWT_ACCESS_TOKEN_EXPIRES = 3600  # 1 hour
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 10))
 
     # Mail config
     MAIL_SERVER = os.getenv("MAIL_SERVER", "smtp.gmail.com")
@@ -17,5 +19,10 @@ class Config:
     MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
     MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER")
 
+    # Response cache (disabled when unset)
+    REDIS_URL = os.getenv("REDIS_URL")
+    # Seconds; a hung Redis fails fast into the cache-miss path instead of blocking requests
+    REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 0.2))
+
     # Rate limiting
     RATELIMIT_DEFAULT = "100 per hour"
@@ -0,0 +1,38 @@
+import orjson
+from flask import Response, stream_with_context
+from flask.json.provider import JSONProvider
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    Flask JSON provider backed by orjson.
+    Serializes datetime (naive values are treated as UTC), numpy values and,
+    via str(), ObjectId and Decimal without manual conversion in the routes.
+    Non-string dict keys are stringified as the stdlib encoder does.
+    """
+
+    option = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=str, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+def stream_json(key: str, rows, trailer=dict) -> Response:
+    """
+    Stream {"<key>": [rows...], **trailer()} as a chunked response without
+    materializing the row list. trailer is called after the last row, so it
+    may depend on what was streamed.
+    """
+    def generate():
+        yield b'{"' + key.encode() + b'":['
+        for i, row in enumerate(rows):
+            if i:
+                yield b","
+            yield orjson.dumps(row, default=str, option=OrjsonProvider.option)
+        tail = orjson.dumps(trailer(), default=str, option=OrjsonProvider.option)
+        yield b"]" + (b"," + tail[1:] if tail != b"{}" else b"}")
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
@@ -1,8 +1,78 @@
 import numpy as np
 import os
-import pickle
+import joblib
+import threading
+from app.services.batcher import AdaptiveBatcher
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
 
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "fraud_model.pkl")
+# Written by train_fraud_model.py when skl2onnx is installed
+ONNX_MODEL_PATH = os.path.join(os.path.dirname(__file__), "fraud_model.onnx")
+
+_model = None
+_model_loaded = False
+_model_lock = threading.Lock()
+
+
+def _onnx_is_current() -> bool:
+    """True if the ONNX export exists and was written no earlier than fraud_model.pkl."""
+    if not os.path.exists(ONNX_MODEL_PATH):
+        return False
+    return not os.path.exists(MODEL_PATH) or os.path.getmtime(ONNX_MODEL_PATH) >= os.path.getmtime(MODEL_PATH)
+
+
+def _get_model():
+    """
+    Load the trained model once and reuse it. Returns None if not trained.
+    Prefers the ONNX export when onnxruntime is installed and it is not older than the pickle.
+    """
+    global _model, _model_loaded
+    if not _model_loaded:
+        with _model_lock:
+            if not _model_loaded:
+                if ort is not None and _onnx_is_current():
+                    _model = ort.InferenceSession(ONNX_MODEL_PATH, providers=["CPUExecutionProvider"])
+                elif os.path.exists(MODEL_PATH):
+                    _model = joblib.load(MODEL_PATH)
+                _model_loaded = True
+    return _model
+
+
+def _predict_batch(features: np.ndarray) -> list:
+    """Score a (N, 4) feature matrix in one model call."""
+    model = _get_model()
+    if ort is not None and isinstance(model, ort.InferenceSession):
+        # Outputs match predict() and decision_function() of the sklearn pipeline
+        labels, scores = model.run(None, {"X": features.astype(np.float32)})
+        return list(zip(labels.ravel(), scores.ravel()))
+    # Scale once and derive labels from the scores; Pipeline.predict and
+    # decision_function would each re-run the scaler and the forest
+    scaler, clf = model.named_steps["scaler"], model.named_steps["clf"]
+    scores = clf.decision_function(scaler.transform(features))
+    predictions = np.where(scores < 0, -1, 1)  # Same threshold IsolationForest.predict uses
+    return list(zip(predictions, scores))
+
+
+_batcher = AdaptiveBatcher(_predict_batch)
+
+# Per-thread (1, 4) feature row, filled in place for each prediction
+_tls = threading.local()
+
+
+def _feature_row(transaction_data: dict) -> np.ndarray:
+    """Write the model features into this thread's reusable buffer."""
+    buf = getattr(_tls, "buf", None)
+    if buf is None:
+        buf = _tls.buf = np.empty((1, 4), dtype=np.float32)
+    buf[0, 0] = transaction_data.get("amount", 0)
+    buf[0, 1] = transaction_data.get("hour", 12)
+    buf[0, 2] = transaction_data.get("balance_before", 0)
+    buf[0, 3] = transaction_data.get("transaction_count_today", 0)
+    return buf
 
 
 def _rule_based_fraud_score(data: dict) -> float:
@@ -42,19 +112,10 @@ def predict_fraud(transaction_data: dict) -> dict:
     Returns dict with is_fraud (bool) and fraud_score (float).
     """
     try:
-        if os.path.exists(MODEL_PATH):
-            with open(MODEL_PATH, "rb") as f:
-                model = pickle.load(f)
-
-            features = np.array([[
-                transaction_data.get("amount", 0),
-                transaction_data.get("hour", 12),
-                transaction_data.get("balance_before", 0),
-                transaction_data.get("transaction_count_today", 0)
-            ]])
-
-            prediction = model.predict(features)[0]
-            score = model.decision_function(features)[0]
+        model = _get_model()
+        if model is not None:
+            # Safe to reuse: the batcher copies the row (vstack) before predict() returns
+            prediction, score = _batcher.predict(_feature_row(transaction_data))
             # Normalize score to 0-1 range
             normalized_score = max(0, min(1, (1 - score) / 2))
 
@@ -1,9 +1,73 @@
 import numpy as np
 import os
-import pickle
+import joblib
+import threading
+from dataclasses import dataclass, field
+from app.services.batcher import AdaptiveBatcher
 
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "loan_model.pkl")
 
+_model = None
+_model_loaded = False
+_model_lock = threading.Lock()
+
+
+@dataclass
+class LoanModel:
+    """
+    Standardize-then-logistic-regression model saved by train/train_loan_model.py.
+    The scaler is folded into the weights, so scoring a batch is one matrix-vector product.
+    """
+    mean: np.ndarray
+    scale: np.ndarray
+    coef: np.ndarray
+    intercept: float
+    weights: np.ndarray = field(init=False)
+    bias: float = field(init=False)
+
+    def __post_init__(self):
+        # ((X - mean) / scale) @ coef + intercept == X @ weights + bias
+        self.weights = np.asarray(self.coef, dtype=np.float64) / self.scale
+        self.bias = float(self.intercept - np.dot(self.mean, self.weights))
+
+    @classmethod
+    def from_saved(cls, saved) -> "LoanModel":
+        """Build from the saved parameter dict, or from a Pipeline saved by older training runs."""
+        if isinstance(saved, dict):
+            return cls(saved["mean"], saved["scale"], saved["coef"], saved["intercept"])
+        scaler, clf = saved.named_steps["scaler"], saved.named_steps["clf"]
+        return cls(scaler.mean_, scaler.scale_, clf.coef_[0], float(clf.intercept_[0]))
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        return X @ self.weights + self.bias
+
+    def predict_batch(self, X: np.ndarray) -> np.ndarray:
+        """Probability of eligibility for each row of a (N, 4) feature matrix."""
+        return 1.0 / (1.0 + np.exp(-self.decision_function(X)))
+
+
+def _get_model():
+    """Load the trained model once and reuse it. Returns None if not trained."""
+    global _model, _model_loaded
+    if not _model_loaded:
+        with _model_lock:
+            if not _model_loaded:
+                if os.path.exists(MODEL_PATH):
+                    # Saved compressed (a few hundred bytes), so it is loaded without mmap_mode
+                    _model = LoanModel.from_saved(joblib.load(MODEL_PATH))
+                _model_loaded = True
+    return _model
+
+
+def _predict_batch(features: np.ndarray) -> list:
+    """Score a (N, 4) feature matrix in one matrix-vector product."""
+    probas = _get_model().predict_batch(features)
+    # Same as LogisticRegression.predict (decision value > 0) except within ~1e-16 of the boundary
+    return list(zip((probas > 0.5).astype(int), probas))
+
+
+_batcher = AdaptiveBatcher(_predict_batch)
+
 
 def _rule_based_loan_score(data: dict) -> dict:
     """Rule-based loan eligibility when ML model not trained."""
@@ -65,10 +129,8 @@ def predict_loan_eligibility(applicant_data: dict) -> dict:
     Returns eligibility status, score, and reasons.
     """
     try:
-        if os.path.exists(MODEL_PATH):
-            with open(MODEL_PATH, "rb") as f:
-                model = pickle.load(f)
-
+        model = _get_model()
+        if model is not None:
             features = np.array([[
                 applicant_data.get("average_balance", 0),
                 applicant_data.get("account_age_days", 0),
@@ -76,13 +138,12 @@ def predict_loan_eligibility(applicant_data: dict) -> dict:
                 applicant_data.get("requested_amount", 0)
             ]])
 
-            prediction = model.predict(features)[0]
-            proba = model.predict_proba(features)[0]
+            prediction, proba = _batcher.predict(features)
 
             return {
                 "eligible": bool(prediction == 1),
-                "score": int(proba[1] * 100),
-                "confidence": round(float(proba[1]), 2),
+                "score": int(proba * 100),
+                "confidence": round(float(proba), 2),
                 "reasons": [],
                 "model": "logistic_regression"
             }
@@ -1,5 +1,6 @@
 import re
 from collections import defaultdict
+from typing import Iterable
 
 
 CATEGORY_KEYWORDS = {
@@ -15,63 +16,79 @@ CATEGORY_KEYWORDS = {
 }
 
 
+# One precompiled alternation per category, tried in CATEGORY_KEYWORDS order so
+# the highest-priority category with any matching keyword wins
+_CATEGORY_PATTERNS = [
+    (category, re.compile("|".join(map(re.escape, keywords))))
+    for category, keywords in CATEGORY_KEYWORDS.items() if keywords
+]
+
+
 def classify_transaction(description: str) -> str:
     """Classify a transaction description into a spending category."""
     description_lower = description.lower()
-
-    for category, keywords in CATEGORY_KEYWORDS.items():
-        if category == "other":
-            continue
-        for keyword in keywords:
-            if keyword in description_lower:
-                return category
-
+    for category, pattern in _CATEGORY_PATTERNS:
+        if pattern.search(description_lower):
+            return category
     return "other"
 
 
-def analyze_spending(transactions: list) -> dict:
+def analyze_spending(transactions: Iterable[dict]) -> dict:
     """
-    Analyze spending patterns from a list of transactions.
+    Analyze spending patterns from a list (or any iterable, e.g. a cursor) of transactions.
+    Folds the rows in a single pass, so a cursor is never materialized.
     Returns category-wise breakdown and summary.
     """
-    category_totals = defaultdict(float)
+    category_totals = defaultdict(float)  # Insertion order = first seen, which breaks sort ties
     category_counts = defaultdict(int)
     monthly_spending = defaultdict(float)
+    classified = {}  # Descriptions repeat a lot (same merchants), so classify each once
+    total_spent = 0.0
+    debit_count = 0
 
-    debit_transactions = [t for t in transactions if t.get("type") == "debit"]
-    total_spent = 0
-
-    for txn in debit_transactions:
-        amount = txn.get("amount", 0)
-        description = txn.get("description", "")
-        timestamp = txn.get("timestamp")
+    for txn in transactions:
+        if txn.get("type") != "debit":
+            continue
 
-        category = txn.get("category") or classify_transaction(description)
+        amount = txn.get("amount") or 0
+        category = txn.get("category")
+        if not category:
+            description = txn.get("description") or ""
+            category = classified.get(description)
+            if category is None:
+                category = classified[description] = classify_transaction(description)
 
         category_totals[category] += amount
         category_counts[category] += 1
         total_spent += amount
+        debit_count += 1
 
-        if timestamp:
-            month_key = str(timestamp)[:7]  # YYYY-MM
-            monthly_spending[month_key] += amount
+        timestamp = txn.get("timestamp")
+        if timestamp is not None:
+            monthly_spending[str(timestamp)[:7]] += amount  # YYYY-MM
+
+    if not debit_count:
+        return {
+            "total_spent": 0,
+            "transaction_count": 0,
+            "category_breakdown": {},
+            "monthly_trend": {},
+            "top_category": "none"
+        }
 
-    # Build breakdown with percentages
+    # Build breakdown with percentages, largest total first
     breakdown = {}
-    for category, total in category_totals.items():
+    for category, total in sorted(category_totals.items(), key=lambda item: item[1], reverse=True):
         breakdown[category] = {
             "total": round(total, 2),
             "count": category_counts[category],
             "percentage": round((total / total_spent * 100) if total_spent > 0 else 0, 1)
         }
 
-    # Sort by total descending
-    sorted_breakdown = dict(sorted(breakdown.items(), key=lambda x: x[1]["total"], reverse=True))
-
     return {
         "total_spent": round(total_spent, 2),
-        "transaction_count": len(debit_transactions),
-        "category_breakdown": sorted_breakdown,
+        "transaction_count": debit_count,
+        "category_breakdown": breakdown,
         "monthly_trend": dict(sorted(monthly_spending.items())),
-        "top_category": max(category_totals, key=category_totals.get) if category_totals else "none"
+        "top_category": next(iter(breakdown))
     }
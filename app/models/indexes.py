@@ -0,0 +1,43 @@
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import ConnectionFailure
+
+# (collection, keys, options) for every index the API queries rely on
+INDEXES = [
+    # Users
+    ("users", [("email", ASCENDING)], {"unique": True}),
+    ("users", [("role", ASCENDING), ("_id", DESCENDING)], {}),
+    # Admins have no account number, so only index string values
+    ("users", [("account_number", ASCENDING)], {
+        "unique": True,
+        "partialFilterExpression": {"account_number": {"$type": "string"}}
+    }),
+
+    # Transactions
+    # _id breaks timestamp ties, so keyset pages on (timestamp, _id) come straight off the index
+    ("transactions", [("user_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)], {}),
+    ("transactions", [("user_id", ASCENDING), ("is_flagged", ASCENDING)], {}),
+    ("transactions", [("timestamp", DESCENDING)], {}),
+    ("transactions", [("is_flagged", ASCENDING)], {"partialFilterExpression": {"is_flagged": True}}),
+
+    # Access requests
+    ("access_requests", [("admin_id", ASCENDING), ("user_id", ASCENDING), ("status", ASCENDING)], {}),
+    ("access_requests", [("user_id", ASCENDING), ("status", ASCENDING), ("requested_at", DESCENDING)], {}),
+    ("access_requests", [("status", ASCENDING)], {"partialFilterExpression": {"status": "pending"}}),
+
+    # Audit logs
+    ("audit_logs", [("actor_id", ASCENDING), ("timestamp", DESCENDING)], {}),
+]
+
+
+def ensure_indexes(db, logger):
+    """Create the indexes in INDEXES. Idempotent; run via `flask create-indexes`."""
+    for collection, keys, options in INDEXES:
+        try:
+            db[collection].create_index(keys, **options)
+        except ConnectionFailure as e:
+            # Every remaining call would wait out the same server selection timeout
+            logger.error(f"Index creation aborted, MongoDB unreachable: {e}")
+            return
+        except Exception as e:
+            # One bad index (e.g. duplicates blocking a unique index) shouldn't skip the rest
+            logger.error(f"Index creation failed for {collection} {keys}: {e}")
@@ -1,10 +1,13 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from app import mongo
 from app.services.notification import send_access_request_email
 from app.services.token import verify_permission_token
 from app.services.audit import log_action
+from app.services.cache import cache
+from app.json_provider import stream_json
 from bson import ObjectId
+from bson.errors import InvalidId
 from datetime import datetime, timedelta
 from functools import wraps
 
@@ -16,34 +19,89 @@ def admin_required(fn):
     @wraps(fn)
     @jwt_required()
     def wrapper(*args, **kwargs):
-        identity = get_jwt_identity()
-        if identity.get("role") != "admin":
+        if get_jwt().get("role") != "admin":
             return jsonify({"error": "Admin access required"}), 403
         return fn(*args, **kwargs)
     return wrapper
 
 
+def _join_user_stages(projection):
+    """
+    Aggregation stages that attach the owning user's projected fields as "user".
+    user_id is stored as a string, so it is converted to an ObjectId first;
+    missing or malformed ids leave "user" unset instead of failing.
+    """
+    return [
+        {"$addFields": {"user_oid": {"$convert": {
+            "input": "$user_id", "to": "objectId", "onError": None, "onNull": None
+        }}}},
+        {"$lookup": {
+            "from": "users",
+            "localField": "user_oid",
+            "foreignField": "_id",
+            "pipeline": [{"$project": projection}],
+            "as": "user"
+        }},
+        {"$unwind": {"path": "$user", "preserveNullAndEmptyArrays": True}}
+    ]
+
+
+def _parse_object_id(value):
+    """Parse a path id into an ObjectId once; None if it is malformed."""
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return None
+
+
+def _keyset_query(query, after_oid):
+    """Restrict query to documents older than the cursor (a parsed _id) when one is given."""
+    return {**query, "_id": {"$lt": after_oid}} if after_oid else query
+
+
+def _next_cursor(docs, limit):
+    """Cursor for the following page, or None when this page is the last."""
+    return str(docs[-1]["_id"]) if len(docs) == limit else None
+
+
+def _facet_count(result, key):
+    """Read a {"$count": "n"} facet, which is an empty list when nothing matched."""
+    return result[key][0]["n"] if result[key] else 0
+
+
 @admin_bp.route("/dashboard", methods=["GET"])
 @admin_required
 def admin_dashboard():
     """Admin overview dashboard."""
-    total_users = mongo.db.users.count_documents({"role": "user"})
-    total_transactions = mongo.db.transactions.count_documents({})
-    flagged_transactions = mongo.db.transactions.count_documents({"is_flagged": True})
-    pending_requests = mongo.db.access_requests.count_documents({"status": "pending"})
+    total_transactions = mongo.db.transactions.estimated_document_count()
 
-    # Today's transactions
+    # Flagged and today's transactions in one round trip. The leading $match lets
+    # Mongo use the is_flagged / timestamp indexes before splitting into facets.
     today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    today_transactions = mongo.db.transactions.count_documents({
-        "timestamp": {"$gte": today_start}
-    })
+    txn_counts = next(mongo.db.transactions.aggregate([
+        {"$match": {"$or": [{"is_flagged": True}, {"timestamp": {"$gte": today_start}}]}},
+        {"$facet": {
+            "flagged": [{"$match": {"is_flagged": True}}, {"$count": "n"}],
+            "today": [{"$match": {"timestamp": {"$gte": today_start}}}, {"$count": "n"}]
+        }}
+    ]))
+
+    # Users and pending access requests in one round trip
+    other_counts = {c["_id"]: c["n"] for c in mongo.db.users.aggregate([
+        {"$match": {"role": "user"}},
+        {"$group": {"_id": "users", "n": {"$sum": 1}}},
+        {"$unionWith": {"coll": "access_requests", "pipeline": [
+            {"$match": {"status": "pending"}},
+            {"$group": {"_id": "pending_requests", "n": {"$sum": 1}}}
+        ]}}
+    ])}
 
     return jsonify({
-        "total_users": total_users,
+        "total_users": other_counts.get("users", 0),
         "total_transactions": total_transactions,
-        "flagged_transactions": flagged_transactions,
-        "pending_access_requests": pending_requests,
-        "today_transactions": today_transactions
+        "flagged_transactions": _facet_count(txn_counts, "flagged"),
+        "pending_access_requests": other_counts.get("pending_requests", 0),
+        "today_transactions": _facet_count(txn_counts, "today")
     }), 200
 
 
@@ -51,20 +109,25 @@ def admin_dashboard():
 @admin_required
 def request_access(user_id):
     """Admin requests access to a user account."""
-    identity = get_jwt_identity()
+    user_oid = _parse_object_id(user_id)
+    if not user_oid:
+        return jsonify({"error": "Invalid user id"}), 400
+
+    admin_id = get_jwt_identity()
+    admin_name = get_jwt()["name"]
     data = request.get_json()
 
     reason = data.get("reason", "").strip()
     if not reason or len(reason) < 10:
         return jsonify({"error": "Please provide a detailed reason (min 10 characters)"}), 400
 
-    user = mongo.db.users.find_one({"_id": ObjectId(user_id), "role": "user"})
+    user = mongo.db.users.find_one({"_id": user_oid, "role": "user"}, {"name": 1, "email": 1})
     if not user:
         return jsonify({"error": "User not found"}), 404
 
     # Check if there's already a pending request from this admin for this user
     existing = mongo.db.access_requests.find_one({
-        "admin_id": identity["user_id"],
+        "admin_id": admin_id,
         "user_id": user_id,
         "status": "pending"
     })
@@ -73,15 +136,16 @@ def request_access(user_id):
         return jsonify({"error": "You already have a pending request for this user"}), 409
 
     # Create access request (expires in 24 hours if not responded)
+    now = datetime.utcnow()
     access_request = {
-        "admin_id": identity["user_id"],
-        "admin_name": identity["name"],
+        "admin_id": admin_id,
+        "admin_name": admin_name,
         "user_id": user_id,
         "reason": reason,
         "status": "pending",
         "permission_token": None,
-        "requested_at": datetime.utcnow(),
-        "expires_at": datetime.utcnow() + timedelta(hours=24)
+        "requested_at": now,
+        "expires_at": now + timedelta(hours=24)
     }
 
     result = mongo.db.access_requests.insert_one(access_request)
@@ -91,12 +155,13 @@ def request_access(user_id):
     email_sent = send_access_request_email(
         user_email=user["email"],
         user_name=user["name"],
-        admin_name=identity["name"],
+        admin_name=admin_name,
         reason=reason,
         request_id=request_id
     )
 
-    log_action(identity["user_id"], "admin", "request_account_access", target_user_id=user_id, details={
+    cache.delete_many(f"dashboard:{user_id}")
+    log_action(admin_id, "admin", "request_account_access", target_user_id=user_id, details={
         "reason": reason,
         "request_id": request_id
     })
@@ -105,7 +170,7 @@ def request_access(user_id):
         "message": "Access request sent. User will be notified via email.",
         "request_id": request_id,
         "email_sent": email_sent,
-        "expires_at": str(access_request["expires_at"])
+        "expires_at": access_request["expires_at"]
     }), 201
 
 
@@ -113,10 +178,14 @@ def request_access(user_id):
 @admin_required
 def check_access_status(request_id):
     """Admin checks status of their access request."""
-    identity = get_jwt_identity()
+    request_oid = _parse_object_id(request_id)
+    if not request_oid:
+        return jsonify({"error": "Invalid request id"}), 400
+
+    admin_id = get_jwt_identity()
     req = mongo.db.access_requests.find_one({
-        "_id": ObjectId(request_id),
-        "admin_id": identity["user_id"]
+        "_id": request_oid,
+        "admin_id": admin_id
     })
 
     if not req:
@@ -125,9 +194,9 @@ def check_access_status(request_id):
     return jsonify({
         "request_id": request_id,
         "status": req["status"],
-        "requested_at": str(req["requested_at"]),
-        "expires_at": str(req["expires_at"]),
-        "granted_at": str(req.get("granted_at", "")) if req.get("granted_at") else None,
+        "requested_at": req["requested_at"],
+        "expires_at": req["expires_at"],
+        "granted_at": req.get("granted_at"),
         "permission_token": req.get("permission_token") if req["status"] == "granted" else None
     }), 200
 
@@ -136,7 +205,11 @@ def check_access_status(request_id):
 @admin_required
 def view_user_account(user_id):
     """Admin views user account - requires valid permission token."""
-    identity = get_jwt_identity()
+    user_oid = _parse_object_id(user_id)
+    if not user_oid:
+        return jsonify({"error": "Invalid user id"}), 400
+
+    admin_id = get_jwt_identity()
     permission_token = request.headers.get("X-Permission-Token")
 
     if not permission_token:
@@ -148,7 +221,7 @@ def view_user_account(user_id):
         return jsonify({"error": "Invalid or expired permission token"}), 401
 
     # Ensure token is for this specific admin and user
-    if payload["admin_id"] != identity["user_id"] or payload["user_id"] != user_id:
+    if payload["admin_id"] != admin_id or payload["user_id"] != user_id:
         return jsonify({"error": "Permission token does not match this request"}), 403
 
     # Verify the access request is still granted in DB
@@ -160,18 +233,21 @@ def view_user_account(user_id):
     if not req:
         return jsonify({"error": "Access has been revoked or request not found"}), 403
 
-    user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
+    user = mongo.db.users.find_one({"_id": user_oid}, {
+        "name": 1, "email": 1, "phone": 1, "account_number": 1, "balance": 1, "is_active": 1, "created_at": 1
+    })
     if not user:
         return jsonify({"error": "User not found"}), 404
 
     # Get recent transactions
     transactions = list(mongo.db.transactions.find(
         {"user_id": user_id},
+        {"type": 1, "amount": 1, "description": 1, "balance_after": 1, "is_flagged": 1, "timestamp": 1},
         sort=[("timestamp", -1)],
         limit=20
     ))
 
-    log_action(identity["user_id"], "admin", "viewed_user_account", target_user_id=user_id, details={
+    log_action(admin_id, "admin", "viewed_user_account", target_user_id=user_id, details={
         "request_id": payload["request_id"]
     })
 
@@ -183,7 +259,7 @@ def view_user_account(user_id):
             "account_number": user["account_number"],
             "balance": user["balance"],
             "is_active": user["is_active"],
-            "created_at": str(user["created_at"])
+            "created_at": user["created_at"]
         },
         "transactions": [{
             "type": t["type"],
@@ -191,7 +267,7 @@ def view_user_account(user_id):
             "description": t.get("description", ""),
             "balance_after": t["balance_after"],
             "is_flagged": t.get("is_flagged", False),
-            "timestamp": str(t["timestamp"])
+            "timestamp": t["timestamp"]
         } for t in transactions],
         "access_note": "This access is logged and monitored."
     }), 200
@@ -200,15 +276,22 @@ def view_user_account(user_id):
 @admin_bp.route("/users", methods=["GET"])
 @admin_required
 def list_users():
-    """Get list of all users (basic info only)."""
+    """
+    Get list of all users (basic info only), newest first.
+    Pass ?after=<next_cursor> for keyset pagination; ?page= is still supported.
+    """
     page = int(request.args.get("page", 1))
     limit = int(request.args.get("limit", 10))
-    skip = (page - 1) * limit
+    after = request.args.get("after")
+    after_oid = _parse_object_id(after) if after else None
+    if after and not after_oid:
+        return jsonify({"error": "Invalid cursor"}), 400
 
     users = list(mongo.db.users.find(
-        {"role": "user"},
-        {"password": 0},
-        skip=skip,
+        _keyset_query({"role": "user"}, after_oid),
+        {"name": 1, "email": 1, "account_number": 1, "balance": 1, "is_active": 1},
+        sort=[("_id", -1)],
+        skip=0 if after else (page - 1) * limit,
         limit=limit
     ))
 
@@ -216,7 +299,7 @@ def list_users():
 
     return jsonify({
         "users": [{
-            "user_id": str(u["_id"]),
+            "user_id": u["_id"],
             "name": u["name"],
             "email": u["email"],
             "account_number": u["account_number"],
@@ -225,7 +308,8 @@ def list_users():
         } for u in users],
         "total": total,
         "page": page,
-        "pages": (total + limit - 1) // limit
+        "pages": (total + limit - 1) // limit,
+        "next_cursor": _next_cursor(users, limit)
     }), 200
 
 
@@ -233,67 +317,85 @@ def list_users():
 @admin_required
 def get_flagged_transactions():
     """Get all fraud-flagged transactions."""
-    transactions = list(mongo.db.transactions.find(
-        {"is_flagged": True},
-        sort=[("timestamp", -1)],
-        limit=50
-    ))
-
-    result = []
-    for t in transactions:
-        user = mongo.db.users.find_one({"_id": ObjectId(t["user_id"])}) if t.get("user_id") else None
-        result.append({
-            "transaction_id": str(t["_id"]),
-            "user_name": user["name"] if user else "Unknown",
-            "account_number": user["account_number"] if user else "Unknown",
-            "type": t["type"],
-            "amount": t["amount"],
-            "fraud_score": t.get("fraud_score", 0),
-            "timestamp": str(t["timestamp"])
-        })
-
-    return jsonify({"flagged_transactions": result}), 200
+    transactions = mongo.db.transactions.aggregate([
+        {"$match": {"is_flagged": True}},
+        {"$sort": {"timestamp": -1}},
+        {"$limit": 50},
+        *_join_user_stages({"name": 1, "account_number": 1})
+    ])
+
+    def rows():
+        for t in transactions:
+            user = t.get("user")
+            yield {
+                "transaction_id": t["_id"],
+                "user_name": user["name"] if user else "Unknown",
+                "account_number": user["account_number"] if user else "Unknown",
+                "type": t["type"],
+                "amount": t["amount"],
+                "fraud_score": t.get("fraud_score", 0),
+                "timestamp": t["timestamp"]
+            }
+
+    return stream_json("flagged_transactions", rows())
 
 
 @admin_bp.route("/audit-logs", methods=["GET"])
 @admin_required
 def get_audit_logs():
-    """Get system audit logs."""
+    """
+    Get system audit logs, newest first.
+    Pass ?after=<next_cursor> for keyset pagination; ?page= is still supported.
+    """
     page = int(request.args.get("page", 1))
     limit = int(request.args.get("limit", 20))
-    skip = (page - 1) * limit
-
-    logs = list(mongo.db.audit_logs.find(
-        {},
-        sort=[("timestamp", -1)],
-        skip=skip,
+    after = request.args.get("after")
+    after_oid = _parse_object_id(after) if after else None
+    if after and not after_oid:
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    logs = mongo.db.audit_logs.find(
+        _keyset_query({}, after_oid),
+        sort=[("_id", -1)],
+        skip=0 if after else (page - 1) * limit,
         limit=limit
-    ))
-
-    total = mongo.db.audit_logs.count_documents({})
+    )
 
-    return jsonify({
-        "logs": [{
-            "log_id": str(log["_id"]),
-            "actor_id": log["actor_id"],
-            "actor_role": log["actor_role"],
-            "action": log["action"],
-            "target_user_id": log.get("target_user_id"),
-            "details": log.get("details", {}),
-            "ip_address": log.get("ip_address"),
-            "timestamp": str(log["timestamp"])
-        } for log in logs],
+    total = mongo.db.audit_logs.estimated_document_count()
+    streamed = {"count": 0, "last_id": None}
+
+    def rows():
+        for log in logs:
+            streamed["count"] += 1
+            streamed["last_id"] = log["_id"]
+            yield {
+                "log_id": log["_id"],
+                "actor_id": log["actor_id"],
+                "actor_role": log["actor_role"],
+                "action": log["action"],
+                "target_user_id": log.get("target_user_id"),
+                "details": log.get("details", {}),
+                "ip_address": log.get("ip_address"),
+                "timestamp": log["timestamp"]
+            }
+
+    return stream_json("logs", rows(), lambda: {
         "total": total,
-        "page": page
-    }), 200
+        "page": page,
+        "next_cursor": str(streamed["last_id"]) if streamed["count"] == limit else None
+    })
 
 
 @admin_bp.route("/toggle-account/<user_id>", methods=["POST"])
 @admin_required
 def toggle_account(user_id):
     """Activate or deactivate a user account."""
-    identity = get_jwt_identity()
-    user = mongo.db.users.find_one({"_id": ObjectId(user_id), "role": "user"})
+    user_oid = _parse_object_id(user_id)
+    if not user_oid:
+        return jsonify({"error": "Invalid user id"}), 400
+
+    admin_id = get_jwt_identity()
+    user = mongo.db.users.find_one({"_id": user_oid, "role": "user"}, {"is_active": 1})
 
     if not user:
         return jsonify({"error": "User not found"}), 404
@@ -302,7 +404,8 @@ def toggle_account(user_id):
     mongo.db.users.update_one({"_id": user["_id"]}, {"$set": {"is_active": new_status}})
 
     action = "activated_account" if new_status else "deactivated_account"
-    log_action(identity["user_id"], "admin", action, target_user_id=user_id)
+    cache.invalidate_user(user_id)
+    log_action(admin_id, "admin", action, target_user_id=user_id)
 
     return jsonify({
         "message": f"Account {'activated' if new_status else 'deactivated'} successfully",
@@ -314,19 +417,20 @@ def toggle_account(user_id):
 @admin_required
 def my_requests():
     """Get all access requests sent by this admin."""
-    identity = get_jwt_identity()
+    admin_id = get_jwt_identity()
 
-    requests_list = list(mongo.db.access_requests.find(
-        {"admin_id": identity["user_id"]},
-        sort=[("requested_at", -1)],
-        limit=20
-    ))
+    requests_list = mongo.db.access_requests.aggregate([
+        {"$match": {"admin_id": admin_id}},
+        {"$sort": {"requested_at": -1}},
+        {"$limit": 20},
+        *_join_user_stages({"name": 1, "email": 1, "account_number": 1})
+    ])
 
     result = []
     for r in requests_list:
-        user = mongo.db.users.find_one({"_id": ObjectId(r["user_id"])})
+        user = r.get("user")
         result.append({
-            "request_id": str(r["_id"]),
+            "request_id": r["_id"],
             "user_id": r["user_id"],
             "user_name": user["name"] if user else "Unknown",
             "user_email": user["email"] if user else "",
@@ -334,9 +438,9 @@ def my_requests():
             "reason": r["reason"],
             "status": r["status"],
             "permission_token": r.get("permission_token") if r["status"] == "granted" else None,
-            "requested_at": str(r["requested_at"]),
-            "expires_at": str(r["expires_at"]),
-            "granted_at": str(r["granted_at"]) if r.get("granted_at") else None
+            "requested_at": r["requested_at"],
+            "expires_at": r["expires_at"],
+            "granted_at": r.get("granted_at")
         })
 
     return jsonify({"requests": result}), 200
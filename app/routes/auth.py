@@ -1,24 +1,39 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import create_access_token
 from app import mongo, limiter
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import bcrypt
-import random
-import string
+import hmac
+import secrets
 from datetime import datetime
 
 auth_bp = Blueprint("auth", __name__)
 
 
 def generate_account_number():
-    return "ACC" + "".join(random.choices(string.digits, k=10))
+    # CSPRNG so account numbers can't be predicted from earlier ones
+    return f"ACC{secrets.randbelow(10 ** 10):010d}"
 
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+def hash_password(password: str) -> bytes:
+    # Stored as raw bytes (BSON binary) so no decode/encode round-trip is needed
+    salt = bcrypt.gensalt(rounds=current_app.config["BCRYPT_ROUNDS"])
+    return bcrypt.hashpw(password.encode(), salt)
 
 
-def check_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode(), hashed.encode())
+def check_password(password: str, hashed) -> bool:
+    # Older accounts store the hash as a str
+    if isinstance(hashed, str):
+        hashed = hashed.encode()
+    return bcrypt.checkpw(password.encode(), hashed)
+
+
+def _duplicate_message(error: DuplicateKeyError) -> str:
+    """Client-facing message for a unique index violation on users."""
+    if "email" in (error.details or {}).get("keyPattern", {}):
+        return "Email already registered"
+    return "Could not create account, please try again"
 
 
 @auth_bp.route("/register", methods=["POST"])
@@ -31,7 +46,7 @@ def register():
         return jsonify({"error": "Missing required fields"}), 400
 
     # Check duplicate
-    if mongo.db.users.find_one({"email": data["email"]}):
+    if mongo.db.users.find_one({"email": data["email"].lower()}):
         return jsonify({"error": "Email already registered"}), 409
 
     user = {
@@ -49,7 +64,11 @@ def register():
         "created_at": datetime.utcnow()
     }
 
-    result = mongo.db.users.insert_one(user)
+    try:
+        result = mongo.db.users.insert_one(user)
+    except DuplicateKeyError as e:
+        # Lost a race with a concurrent signup, or drew an account number already in use
+        return jsonify({"error": _duplicate_message(e)}), 409
     return jsonify({
         "message": "Account created successfully",
         "account_number": user["account_number"],
@@ -74,27 +93,38 @@ def login():
         return jsonify({"error": "Account locked due to multiple failed attempts. Contact support."}), 403
 
     if not check_password(data["password"], user["password"]):
-        # Increment failed attempts
-        attempts = user.get("failed_login_attempts", 0) + 1
-        update = {"failed_login_attempts": attempts}
-        if attempts >= 5:
-            update["is_locked"] = True
-        mongo.db.users.update_one({"_id": user["_id"]}, {"$set": update})
+        # Increment failed attempts and lock atomically, so concurrent attempts can't lose updates
+        updated = mongo.db.users.find_one_and_update(
+            {"_id": user["_id"]},
+            [
+                {"$set": {"failed_login_attempts": {"$add": [{"$ifNull": ["$failed_login_attempts", 0]}, 1]}}},
+                {"$set": {"is_locked": {"$or": [
+                    {"$eq": ["$is_locked", True]},
+                    {"$gte": ["$failed_login_attempts", 5]}
+                ]}}}
+            ],
+            projection={"failed_login_attempts": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        attempts = updated["failed_login_attempts"] if updated else 5
         remaining = max(0, 5 - attempts)
         return jsonify({"error": f"Invalid credentials. {remaining} attempts remaining."}), 401
 
     if not user.get("is_active"):
         return jsonify({"error": "Account is deactivated"}), 403
 
-    # Reset failed attempts
-    mongo.db.users.update_one({"_id": user["_id"]}, {"$set": {"failed_login_attempts": 0}})
+    # Reset failed attempts (skipped when there is nothing to reset)
+    if user.get("failed_login_attempts"):
+        mongo.db.users.update_one({"_id": user["_id"]}, {"$set": {"failed_login_attempts": 0}})
 
-    token = create_access_token(identity={
-        "user_id": str(user["_id"]),
-        "email": user["email"],
-        "role": user["role"],
-        "name": user["name"]
-    })
+    token = create_access_token(
+        identity=str(user["_id"]),
+        additional_claims={
+            "email": user["email"],
+            "role": user["role"],
+            "name": user["name"]
+        }
+    )
 
     return jsonify({
         "message": "Login successful",
@@ -114,11 +144,11 @@ def register_admin():
     if not all(k in data for k in required):
         return jsonify({"error": "Missing required fields"}), 400
 
-    # Simple admin secret check (in production use env variable)
-    if data["admin_secret"] != "BANK_ADMIN_SECRET_2024":
+    # Constant-time comparison so the secret can't be recovered via response timing
+    if not hmac.compare_digest(str(data["admin_secret"]).encode(), current_app.config["ADMIN_SECRET"].encode()):
         return jsonify({"error": "Invalid admin secret"}), 403
 
-    if mongo.db.users.find_one({"email": data["email"]}):
+    if mongo.db.users.find_one({"email": data["email"].lower()}):
         return jsonify({"error": "Email already registered"}), 409
 
     admin = {
@@ -135,7 +165,10 @@ def register_admin():
         "created_at": datetime.utcnow()
     }
 
-    result = mongo.db.users.insert_one(admin)
+    try:
+        result = mongo.db.users.insert_one(admin)
+    except DuplicateKeyError as e:
+        return jsonify({"error": _duplicate_message(e)}), 409
     return jsonify({
         "message": "Admin account created successfully",
         "admin_id": str(result.inserted_id)
@@ -4,33 +4,68 @@ from app import mongo
 from app.ml_models.fraud_detection import predict_fraud
 from app.ml_models.loan_eligibility import predict_loan_eligibility
 from app.ml_models.spending_analysis import analyze_spending
+from app.services.cache import cached, SPENDING_CACHE_WINDOWS
+from app.services.txn_stats import txn_count_today
 from bson import ObjectId
 from datetime import datetime, timedelta
+from itertools import chain
 
 ml_bp = Blueprint("ml", __name__)
 
+# Fields analyze_spending reads
+SPENDING_TXN_PROJ = {"type": 1, "amount": 1, "description": 1, "category": 1, "timestamp": 1, "_id": 0}
+MAX_SPENDING_DAYS = 365
+
+
+def _spending_days():
+    """?days= parsed and clamped to 1..MAX_SPENDING_DAYS (default 90); None if not an integer."""
+    try:
+        return min(max(int(request.args.get("days", 90)), 1), MAX_SPENDING_DAYS)
+    except ValueError:
+        return None
+
+
+def _spending_cache_key():
+    days = _spending_days()
+    return f"spending:{get_jwt_identity()}:{days}" if days in SPENDING_CACHE_WINDOWS else None
+
+
+def _transaction_stats(user_id: str, month_ago: datetime) -> dict:
+    """
+    Summarize a user's transaction history in one server-side aggregation.
+    avg_balance is None when no transaction carries balance_after.
+    """
+    result = next(mongo.db.transactions.aggregate([
+        {"$match": {"user_id": user_id}},
+        {"$group": {
+            "_id": None,
+            "count": {"$sum": 1},
+            "avg_balance": {"$avg": "$balance_after"},
+            "monthly_count": {"$sum": {"$cond": [{"$gte": ["$timestamp", month_ago]}, 1, 0]}},
+            "flagged_count": {"$sum": {"$cond": [{"$eq": ["$is_flagged", True]}, 1, 0]}}
+        }}
+    ]), None)
+
+    if not result:
+        return {"count": 0, "avg_balance": None, "monthly_count": 0, "flagged_count": 0}
+    return result
+
 
 @ml_bp.route("/fraud-check", methods=["POST"])
 @jwt_required()
 def fraud_check():
     """Check if a transaction looks fraudulent."""
     data = request.get_json()
-    identity = get_jwt_identity()
+    user_id = get_jwt_identity()
 
-    # Get today's transaction count for this user
-    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    txn_count_today = mongo.db.transactions.count_documents({
-        "user_id": identity["user_id"],
-        "timestamp": {"$gte": today_start}
-    })
-
-    user = mongo.db.users.find_one({"_id": ObjectId(identity["user_id"])})
+    now = datetime.utcnow()
+    user = mongo.db.users.find_one({"_id": ObjectId(user_id)}, {"balance": 1})
 
     transaction_data = {
         "amount": data.get("amount", 0),
-        "hour": datetime.utcnow().hour,
+        "hour": now.hour,
         "balance_before": user["balance"] if user else 0,
-        "transaction_count_today": txn_count_today
+        "transaction_count_today": txn_count_today(user_id, now)
     }
 
     result = predict_fraud(transaction_data)
@@ -48,33 +83,30 @@ def fraud_check():
 @jwt_required()
 def loan_eligibility():
     """Predict loan eligibility for the logged-in user."""
-    identity = get_jwt_identity()
+    user_id = get_jwt_identity()
     data = request.get_json()
 
     requested_amount = data.get("requested_amount", 0)
     if requested_amount <= 0:
         return jsonify({"error": "Requested amount must be greater than 0"}), 400
 
-    user = mongo.db.users.find_one({"_id": ObjectId(identity["user_id"])})
+    user = mongo.db.users.find_one({"_id": ObjectId(user_id)}, {"name": 1, "balance": 1, "created_at": 1})
     if not user:
         return jsonify({"error": "User not found"}), 404
 
     # Calculate features from account history
-    all_transactions = list(mongo.db.transactions.find({"user_id": identity["user_id"]}))
+    now = datetime.utcnow()
+    month_ago = now - timedelta(days=30)
+    stats = _transaction_stats(user_id, month_ago)
 
     # Average balance (approximate from transaction history)
-    balances = [t["balance_after"] for t in all_transactions if "balance_after" in t]
-    avg_balance = sum(balances) / len(balances) if balances else user["balance"]
+    avg_balance = stats["avg_balance"] if stats["avg_balance"] is not None else user["balance"]
 
     # Account age in days
-    account_age = (datetime.utcnow() - user["created_at"]).days
+    account_age = (now - user["created_at"]).days
 
     # Monthly transaction count (last 30 days)
-    month_ago = datetime.utcnow() - timedelta(days=30)
-    monthly_txn_count = mongo.db.transactions.count_documents({
-        "user_id": identity["user_id"],
-        "timestamp": {"$gte": month_ago}
-    })
+    monthly_txn_count = stats["monthly_count"]
 
     applicant_data = {
         "average_balance": avg_balance,
@@ -99,23 +131,32 @@ def loan_eligibility():
 
 @ml_bp.route("/spending-analysis", methods=["GET"])
 @jwt_required()
+@cached(_spending_cache_key, ttl=300)
 def spending_analysis():
     """Get spending category analysis for the user."""
-    identity = get_jwt_identity()
+    user_id = get_jwt_identity()
 
-    # Last 90 days
-    days = int(request.args.get("days", 90))
+    # Last 90 days by default
+    days = _spending_days()
+    if days is None:
+        return jsonify({"error": "days must be an integer"}), 400
     since = datetime.utcnow() - timedelta(days=days)
 
-    transactions = list(mongo.db.transactions.find({
-        "user_id": identity["user_id"],
-        "timestamp": {"$gte": since}
-    }))
-
-    if not transactions:
+    # Only debits count as spending, so filter them server-side; user_id + timestamp
+    # hit the (user_id, timestamp) index and type is checked on the fetched docs
+    cursor = mongo.db.transactions.find({
+        "user_id": user_id,
+        "timestamp": {"$gte": since},
+        "type": "debit"
+    }, SPENDING_TXN_PROJ).batch_size(500)
+
+    # Peek one document for the empty check, then let analyze_spending fold the
+    # rest batch by batch; only one cursor batch is held in memory at a time
+    first = next(cursor, None)
+    if first is None:
         return jsonify({"message": "No transactions found for the selected period"}), 200
 
-    result = analyze_spending(transactions)
+    result = analyze_spending(chain([first], cursor))
 
     return jsonify({
         "period_days": days,
@@ -125,30 +166,31 @@ def spending_analysis():
 
 @ml_bp.route("/credit-score", methods=["GET"])
 @jwt_required()
+@cached(lambda: f"credit:{get_jwt_identity()}", ttl=300)
 def credit_score():
     """Calculate a simulated credit score (300-900) based on account behavior."""
-    identity = get_jwt_identity()
+    user_id = get_jwt_identity()
 
-    user = mongo.db.users.find_one({"_id": ObjectId(identity["user_id"])})
+    user = mongo.db.users.find_one({"_id": ObjectId(user_id)}, {"created_at": 1})
     if not user:
         return jsonify({"error": "User not found"}), 404
 
-    all_transactions = list(mongo.db.transactions.find({"user_id": identity["user_id"]}))
+    now = datetime.utcnow()
+    month_ago = now - timedelta(days=30)
+    stats = _transaction_stats(user_id, month_ago)
 
     score = 300  # Base score
     factors = []
 
     # 1. Account age (up to 100 points)
-    account_age_days = (datetime.utcnow() - user["created_at"]).days
+    account_age_days = (now - user["created_at"]).days
     age_score = min(100, account_age_days // 3)
     score += age_score
     factors.append({"factor": "Account Age", "points": age_score, "max": 100})
 
     # 2. Balance consistency (up to 150 points)
-    if all_transactions:
-        balances = [t["balance_after"] for t in all_transactions]
-        avg_balance = sum(balances) / len(balances)
-        min_balance = min(balances)
+    if stats["count"]:
+        avg_balance = stats["avg_balance"] or 0
         balance_score = min(150, int(avg_balance / 1000) * 10) if avg_balance > 0 else 0
         score += balance_score
         factors.append({"factor": "Average Balance", "points": balance_score, "max": 150})
@@ -156,14 +198,13 @@ def credit_score():
         factors.append({"factor": "Average Balance", "points": 0, "max": 150})
 
     # 3. Transaction frequency (up to 150 points)
-    month_ago = datetime.utcnow() - timedelta(days=30)
-    monthly_count = sum(1 for t in all_transactions if t["timestamp"] >= month_ago)
+    monthly_count = stats["monthly_count"]
     freq_score = min(150, monthly_count * 10)
     score += freq_score
     factors.append({"factor": "Transaction Activity", "points": freq_score, "max": 150})
 
     # 4. No fraud flags (up to 200 points)
-    flagged_count = sum(1 for t in all_transactions if t.get("is_flagged"))
+    flagged_count = stats["flagged_count"]
     fraud_score = max(0, 200 - flagged_count * 50)
     score += fraud_score
     factors.append({"factor": "Clean Transaction History", "points": fraud_score, "max": 200})
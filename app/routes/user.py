@@ -1,46 +1,77 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import mongo
+from pymongo import ReturnDocument
+from app.ml_models.fraud_detection import predict_fraud
 from app.services.notification import send_transaction_alert_email, send_access_decision_email
 from app.services.audit import log_action
+from app.services.cache import cache, cached
 from app.services.token import generate_permission_token
+from app.services.ttl_cache import TTLCache
+from app.services.txn_stats import txn_count_today
 from bson import ObjectId
+from bson.errors import InvalidId
 from datetime import datetime
 
 user_bp = Blueprint("user", __name__)
 
+# Fields read by serialize_user / serialize_transaction; keeps password hashes etc. off the wire
+USER_SUMMARY_PROJ = {
+    "name": 1, "email": 1, "phone": 1, "account_number": 1, "balance": 1, "is_active": 1, "created_at": 1
+}
+TXN_SUMMARY_PROJ = {
+    "type": 1, "amount": 1, "description": 1, "balance_after": 1, "is_flagged": 1, "fraud_score": 1, "timestamp": 1
+}
+
+# account_number -> user _id for transfer recipients; account numbers never change.
+# Only the _id is cached: balances always come back from the $inc itself.
+_recipient_ids = TTLCache(maxsize=10_000, ttl=60)
+
+
+def _recipient_id(account_number: str):
+    """Resolve a recipient's _id by account number, or None if no such account."""
+    recipient_id = _recipient_ids.get(account_number)
+    if recipient_id is None:
+        recipient = mongo.db.users.find_one({"account_number": account_number}, {"_id": 1})
+        if not recipient:
+            return None
+        recipient_id = recipient["_id"]
+        _recipient_ids.set(account_number, recipient_id)
+    return recipient_id
+
 
 def serialize_user(user):
     return {
-        "user_id": str(user["_id"]),
+        "user_id": user["_id"],
         "name": user["name"],
         "email": user["email"],
         "phone": user["phone"],
         "account_number": user["account_number"],
         "balance": user["balance"],
         "is_active": user["is_active"],
-        "created_at": str(user["created_at"])
+        "created_at": user["created_at"]
     }
 
 
 def serialize_transaction(txn):
     return {
-        "transaction_id": str(txn["_id"]),
+        "transaction_id": txn["_id"],
         "type": txn["type"],
         "amount": txn["amount"],
         "description": txn.get("description", ""),
         "balance_after": txn["balance_after"],
         "is_flagged": txn.get("is_flagged", False),
         "fraud_score": txn.get("fraud_score", 0),
-        "timestamp": str(txn["timestamp"])
+        "timestamp": txn["timestamp"]
     }
 
 
 @user_bp.route("/profile", methods=["GET"])
 @jwt_required()
+@cached(lambda: f"profile:{get_jwt_identity()}", ttl=120)
 def get_profile():
-    identity = get_jwt_identity()
-    user = mongo.db.users.find_one({"_id": ObjectId(identity["user_id"])})
+    user_id = get_jwt_identity()
+    user = mongo.db.users.find_one({"_id": ObjectId(user_id)}, USER_SUMMARY_PROJ)
     if not user:
         return jsonify({"error": "User not found"}), 404
     return jsonify(serialize_user(user)), 200
@@ -48,36 +79,38 @@ def get_profile():
 
 @user_bp.route("/dashboard", methods=["GET"])
 @jwt_required()
+@cached(lambda: f"dashboard:{get_jwt_identity()}", ttl=60)
 def dashboard():
-    identity = get_jwt_identity()
-    user = mongo.db.users.find_one({"_id": ObjectId(identity["user_id"])})
+    user_id = get_jwt_identity()
+    user = mongo.db.users.find_one({"_id": ObjectId(user_id)}, USER_SUMMARY_PROJ)
     if not user:
         return jsonify({"error": "User not found"}), 404
 
     # Recent 5 transactions
     transactions = list(mongo.db.transactions.find(
-        {"user_id": str(user["_id"])},
+        {"user_id": user_id},
+        TXN_SUMMARY_PROJ,
         sort=[("timestamp", -1)],
         limit=5
     ))
 
     # Pending access requests
-    pending_requests = list(mongo.db.access_requests.find({
-        "user_id": str(user["_id"]),
+    pending_requests = mongo.db.access_requests.count_documents({
+        "user_id": user_id,
         "status": "pending"
-    }))
+    })
 
     return jsonify({
         "account": serialize_user(user),
         "recent_transactions": [serialize_transaction(t) for t in transactions],
-        "pending_access_requests": len(pending_requests)
+        "pending_access_requests": pending_requests
     }), 200
 
 
 @user_bp.route("/deposit", methods=["POST"])
 @jwt_required()
 def deposit():
-    identity = get_jwt_identity()
+    user_id = get_jwt_identity()
     data = request.get_json()
 
     amount = data.get("amount", 0)
@@ -86,18 +119,20 @@ def deposit():
     if amount > 1000000:
         return jsonify({"error": "Maximum deposit limit is ₹10,00,000"}), 400
 
-    user = mongo.db.users.find_one({"_id": ObjectId(identity["user_id"])})
-    new_balance = user["balance"] + amount
-
-    # Update balance
-    mongo.db.users.update_one(
-        {"_id": user["_id"]},
-        {"$set": {"balance": new_balance}}
+    # Atomic credit; returns the updated balance in the same round trip
+    user = mongo.db.users.find_one_and_update(
+        {"_id": ObjectId(user_id)},
+        {"$inc": {"balance": amount}},
+        projection={"name": 1, "email": 1, "balance": 1},
+        return_document=ReturnDocument.AFTER
     )
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+    new_balance = user["balance"]
 
     # Record transaction
     txn = {
-        "user_id": str(user["_id"]),
+        "user_id": user_id,
         "type": "credit",
         "amount": amount,
         "description": data.get("description", "Deposit"),
@@ -111,7 +146,8 @@ def deposit():
     # Send alert email
     send_transaction_alert_email(user["email"], user["name"], "credit", amount, new_balance)
 
-    log_action(str(user["_id"]), "user", "deposit", details={"amount": amount})
+    cache.invalidate_user(user_id)
+    log_action(user_id, "user", "deposit", details={"amount": amount})
 
     return jsonify({
         "message": "Deposit successful",
@@ -123,53 +159,50 @@ def deposit():
 @user_bp.route("/withdraw", methods=["POST"])
 @jwt_required()
 def withdraw():
-    identity = get_jwt_identity()
+    user_id = get_jwt_identity()
     data = request.get_json()
 
     amount = data.get("amount", 0)
     if amount <= 0:
         return jsonify({"error": "Amount must be greater than 0"}), 400
 
-    user = mongo.db.users.find_one({"_id": ObjectId(identity["user_id"])})
-
-    if user["balance"] < amount:
+    # Atomic debit, guarded so concurrent withdrawals can't overdraw the account
+    user = mongo.db.users.find_one_and_update(
+        {"_id": ObjectId(user_id), "balance": {"$gte": amount}},
+        {"$inc": {"balance": -amount}},
+        projection={"name": 1, "email": 1, "balance": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if not user:
         return jsonify({"error": "Insufficient balance"}), 400
 
-    new_balance = user["balance"] - amount
+    new_balance = user["balance"]
+    now = datetime.utcnow()
 
-    # Check fraud before processing
-    from app.ml_models.fraud_detection import predict_fraud
+    # Score for fraud (flags the transaction for review, never blocks it)
     fraud_result = predict_fraud({
         "amount": amount,
-        "hour": datetime.utcnow().hour,
-        "balance_before": user["balance"],
-        "transaction_count_today": mongo.db.transactions.count_documents({
-            "user_id": str(user["_id"]),
-            "timestamp": {"$gte": datetime.utcnow().replace(hour=0, minute=0, second=0)}
-        })
+        "hour": now.hour,
+        "balance_before": new_balance + amount,
+        "transaction_count_today": txn_count_today(user_id, now)
     })
 
-    # Update balance
-    mongo.db.users.update_one(
-        {"_id": user["_id"]},
-        {"$set": {"balance": new_balance}}
-    )
-
     # Record transaction
     txn = {
-        "user_id": str(user["_id"]),
+        "user_id": user_id,
         "type": "debit",
         "amount": amount,
         "description": data.get("description", "Withdrawal"),
         "balance_after": new_balance,
         "is_flagged": fraud_result["is_fraud"],
         "fraud_score": fraud_result["fraud_score"],
-        "timestamp": datetime.utcnow()
+        "timestamp": now
     }
     mongo.db.transactions.insert_one(txn)
 
     send_transaction_alert_email(user["email"], user["name"], "debit", amount, new_balance)
-    log_action(str(user["_id"]), "user", "withdrawal", details={
+    cache.invalidate_user(user_id)
+    log_action(user_id, "user", "withdrawal", details={
         "amount": amount,
         "fraud_flagged": fraud_result["is_fraud"]
     })
@@ -189,7 +222,7 @@ def withdraw():
 @user_bp.route("/transfer", methods=["POST"])
 @jwt_required()
 def transfer():
-    identity = get_jwt_identity()
+    user_id = get_jwt_identity()
     data = request.get_json()
 
     amount = data.get("amount", 0)
@@ -200,56 +233,74 @@ def transfer():
     if amount <= 0:
         return jsonify({"error": "Amount must be greater than 0"}), 400
 
-    sender = mongo.db.users.find_one({"_id": ObjectId(identity["user_id"])})
-    recipient = mongo.db.users.find_one({"account_number": to_account})
+    sender_oid = ObjectId(user_id)
+    recipient_oid = _recipient_id(to_account)
 
-    if not recipient:
+    if not recipient_oid:
         return jsonify({"error": "Recipient account not found"}), 404
-    if str(sender["_id"]) == str(recipient["_id"]):
+    if recipient_oid == sender_oid:
         return jsonify({"error": "Cannot transfer to own account"}), 400
-    if sender["balance"] < amount:
-        return jsonify({"error": "Insufficient balance"}), 400
 
-    sender_new_balance = sender["balance"] - amount
-    recipient_new_balance = recipient["balance"] + amount
+    # Debit sender atomically, guarded against overdraft
+    sender = mongo.db.users.find_one_and_update(
+        {"_id": sender_oid, "balance": {"$gte": amount}},
+        {"$inc": {"balance": -amount}},
+        projection={"name": 1, "email": 1, "account_number": 1, "balance": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if not sender:
+        return jsonify({"error": "Insufficient balance"}), 400
 
-    # Debit sender
-    mongo.db.users.update_one({"_id": sender["_id"]}, {"$set": {"balance": sender_new_balance}})
     # Credit recipient
-    mongo.db.users.update_one({"_id": recipient["_id"]}, {"$set": {"balance": recipient_new_balance}})
+    recipient = mongo.db.users.find_one_and_update(
+        {"_id": recipient_oid},
+        {"$inc": {"balance": amount}},
+        projection={"name": 1, "email": 1, "account_number": 1, "balance": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if not recipient:
+        # Recipient vanished between lookup and credit; refund the sender
+        _recipient_ids.pop(to_account)
+        mongo.db.users.update_one({"_id": sender_oid}, {"$inc": {"balance": amount}})
+        return jsonify({"error": "Recipient account not found"}), 404
 
-    now = datetime.utcnow()
+    sender_new_balance = sender["balance"]
+    recipient_new_balance = recipient["balance"]
 
-    # Sender transaction
-    mongo.db.transactions.insert_one({
-        "user_id": str(sender["_id"]),
-        "type": "debit",
-        "amount": amount,
-        "description": f"Transfer to {recipient['account_number']} - {data.get('description', '')}",
-        "balance_after": sender_new_balance,
-        "related_account": to_account,
-        "is_flagged": False,
-        "fraud_score": 0.0,
-        "timestamp": now
-    })
+    now = datetime.utcnow()
 
-    # Recipient transaction
-    mongo.db.transactions.insert_one({
-        "user_id": str(recipient["_id"]),
-        "type": "credit",
-        "amount": amount,
-        "description": f"Transfer from {sender['account_number']} - {data.get('description', '')}",
-        "balance_after": recipient_new_balance,
-        "related_account": sender["account_number"],
-        "is_flagged": False,
-        "fraud_score": 0.0,
-        "timestamp": now
-    })
+    # Both legs of the transfer in one round trip
+    mongo.db.transactions.insert_many([
+        {
+            "user_id": user_id,
+            "type": "debit",
+            "amount": amount,
+            "description": f"Transfer to {recipient['account_number']} - {data.get('description', '')}",
+            "balance_after": sender_new_balance,
+            "related_account": to_account,
+            "is_flagged": False,
+            "fraud_score": 0.0,
+            "timestamp": now
+        },
+        {
+            "user_id": str(recipient["_id"]),
+            "type": "credit",
+            "amount": amount,
+            "description": f"Transfer from {sender['account_number']} - {data.get('description', '')}",
+            "balance_after": recipient_new_balance,
+            "related_account": sender["account_number"],
+            "is_flagged": False,
+            "fraud_score": 0.0,
+            "timestamp": now
+        }
+    ], ordered=False)
 
     send_transaction_alert_email(sender["email"], sender["name"], "debit", amount, sender_new_balance)
     send_transaction_alert_email(recipient["email"], recipient["name"], "credit", amount, recipient_new_balance)
 
-    log_action(str(sender["_id"]), "user", "transfer", details={
+    cache.invalidate_user(user_id)
+    cache.invalidate_user(str(recipient["_id"]))
+    log_action(user_id, "user", "transfer", details={
         "amount": amount,
         "to_account": to_account
     })
@@ -262,50 +313,96 @@ def transfer():
     }), 200
 
 
+def _parse_txn_cursor(cursor: str):
+    """Split a "<timestamp>_<transaction id>" cursor; None if it is malformed."""
+    try:
+        timestamp, txn_id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(timestamp), ObjectId(txn_id)
+    except (ValueError, InvalidId):
+        return None
+
+
 @user_bp.route("/transactions", methods=["GET"])
 @jwt_required()
 def get_transactions():
-    identity = get_jwt_identity()
+    """
+    Get the user's transactions, newest first.
+    Pass ?before=<next_cursor> for keyset pagination; ?page= is still supported.
+    total / pages / page are only returned in page mode.
+    """
+    user_id = get_jwt_identity()
     page = int(request.args.get("page", 1))
     limit = int(request.args.get("limit", 10))
-    skip = (page - 1) * limit
-
+    before = request.args.get("before")
+
+    query = {"user_id": user_id}
+    if before:
+        cursor = _parse_txn_cursor(before)
+        if not cursor:
+            return jsonify({"error": "Invalid cursor"}), 400
+        # Keyset on (timestamp, _id) so rows sharing the boundary timestamp aren't skipped
+        timestamp, txn_id = cursor
+        query["$or"] = [
+            {"timestamp": {"$lt": timestamp}},
+            {"timestamp": timestamp, "_id": {"$lt": txn_id}}
+        ]
+
+    # Walks the (user_id, timestamp, _id) index in order, so only the returned page is fetched
     transactions = list(mongo.db.transactions.find(
-        {"user_id": identity["user_id"]},
-        sort=[("timestamp", -1)],
-        skip=skip,
+        query,
+        TXN_SUMMARY_PROJ,
+        sort=[("timestamp", -1), ("_id", -1)],
+        skip=0 if before else (page - 1) * limit,
         limit=limit
     ))
 
-    total = mongo.db.transactions.count_documents({"user_id": identity["user_id"]})
-
-    return jsonify({
+    response = {
         "transactions": [serialize_transaction(t) for t in transactions],
-        "total": total,
-        "page": page,
-        "pages": (total + limit - 1) // limit
-    }), 200
+        "next_cursor": None
+    }
+    # Cursor pages are a single round trip; the history-wide count is only paid for page mode
+    if not before:
+        total = mongo.db.transactions.count_documents({"user_id": user_id})
+        response.update(total=total, pages=(total + limit - 1) // limit, page=page)
+    if len(transactions) == limit:
+        last = transactions[-1]
+        response["next_cursor"] = f"{last['timestamp'].isoformat()}_{last['_id']}"
+
+    return jsonify(response), 200
 
 
 @user_bp.route("/access-requests", methods=["GET"])
 @jwt_required()
 def get_access_requests():
     """Get all pending access requests for the logged-in user."""
-    identity = get_jwt_identity()
-    requests = list(mongo.db.access_requests.find(
-        {"user_id": identity["user_id"], "status": "pending"},
-        sort=[("requested_at", -1)]
-    ))
+    user_id = get_jwt_identity()
+    # Join each request's admin name server-side instead of one lookup per request.
+    # admin_id is stored as a string, so convert it before matching users._id.
+    requests = mongo.db.access_requests.aggregate([
+        {"$match": {"user_id": user_id, "status": "pending"}},
+        {"$sort": {"requested_at": -1}},
+        {"$addFields": {"admin_oid": {"$convert": {
+            "input": "$admin_id", "to": "objectId", "onError": None, "onNull": None
+        }}}},
+        {"$lookup": {
+            "from": "users",
+            "localField": "admin_oid",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"name": 1}}],
+            "as": "admin"
+        }},
+        {"$unwind": {"path": "$admin", "preserveNullAndEmptyArrays": True}},
+        {"$project": {"reason": 1, "requested_at": 1, "expires_at": 1, "admin_name": "$admin.name"}}
+    ])
 
     result = []
     for r in requests:
-        admin = mongo.db.users.find_one({"_id": ObjectId(r["admin_id"])})
         result.append({
-            "request_id": str(r["_id"]),
-            "admin_name": admin["name"] if admin else "Unknown",
+            "request_id": r["_id"],
+            "admin_name": r.get("admin_name", "Unknown"),
             "reason": r["reason"],
-            "requested_at": str(r["requested_at"]),
-            "expires_at": str(r["expires_at"])
+            "requested_at": r["requested_at"],
+            "expires_at": r["expires_at"]
         })
 
     return jsonify({"access_requests": result}), 200
@@ -314,7 +411,9 @@ def get_access_requests():
 @user_bp.route("/grant-access/<request_id>", methods=["GET", "POST"])
 def grant_access(request_id):
     """User grants access to admin. Works via link click or API."""
-    req = mongo.db.access_requests.find_one({"_id": ObjectId(request_id)})
+    request_oid = ObjectId(request_id)
+    now = datetime.utcnow()
+    req = mongo.db.access_requests.find_one({"_id": request_oid})
 
     if not req:
         return jsonify({"error": "Access request not found"}), 404
@@ -322,33 +421,33 @@ def grant_access(request_id):
         return jsonify({"error": f"Request already {req['status']}"}), 400
 
     # Check if expired
-    if datetime.utcnow() > req["expires_at"]:
+    if now > req["expires_at"]:
         mongo.db.access_requests.update_one(
-            {"_id": ObjectId(request_id)},
+            {"_id": request_oid},
             {"$set": {"status": "expired"}}
         )
         return jsonify({"error": "Access request has expired"}), 410
 
     # Generate permission token
-    from app.services.token import generate_permission_token
     permission_token = generate_permission_token(req["admin_id"], req["user_id"], request_id)
 
     mongo.db.access_requests.update_one(
-        {"_id": ObjectId(request_id)},
+        {"_id": request_oid},
         {"$set": {
             "status": "granted",
             "permission_token": permission_token,
-            "granted_at": datetime.utcnow()
+            "granted_at": now
         }}
     )
 
     # Notify admin
-    admin = mongo.db.users.find_one({"_id": ObjectId(req["admin_id"])})
-    user = mongo.db.users.find_one({"_id": ObjectId(req["user_id"])})
+    admin = mongo.db.users.find_one({"_id": ObjectId(req["admin_id"])}, {"name": 1, "email": 1})
+    user = mongo.db.users.find_one({"_id": ObjectId(req["user_id"])}, {"name": 1})
 
     if admin and user:
         send_access_decision_email(admin["email"], admin["name"], user["name"], "granted")
 
+    cache.delete_many(f"dashboard:{req['user_id']}")
     log_action(req["user_id"], "user", "grant_admin_access", details={"request_id": request_id})
 
     return jsonify({
@@ -360,7 +459,9 @@ def grant_access(request_id):
 @user_bp.route("/deny-access/<request_id>", methods=["GET", "POST"])
 def deny_access(request_id):
     """User denies admin access request."""
-    req = mongo.db.access_requests.find_one({"_id": ObjectId(request_id)})
+    request_oid = ObjectId(request_id)
+    now = datetime.utcnow()
+    req = mongo.db.access_requests.find_one({"_id": request_oid})
 
     if not req:
         return jsonify({"error": "Access request not found"}), 404
@@ -368,16 +469,17 @@ def deny_access(request_id):
         return jsonify({"error": f"Request already {req['status']}"}), 400
 
     mongo.db.access_requests.update_one(
-        {"_id": ObjectId(request_id)},
-        {"$set": {"status": "denied", "denied_at": datetime.utcnow()}}
+        {"_id": request_oid},
+        {"$set": {"status": "denied", "denied_at": now}}
     )
 
-    admin = mongo.db.users.find_one({"_id": ObjectId(req["admin_id"])})
-    user = mongo.db.users.find_one({"_id": ObjectId(req["user_id"])})
+    admin = mongo.db.users.find_one({"_id": ObjectId(req["admin_id"])}, {"name": 1, "email": 1})
+    user = mongo.db.users.find_one({"_id": ObjectId(req["user_id"])}, {"name": 1})
 
     if admin and user:
         send_access_decision_email(admin["email"], admin["name"], user["name"], "denied")
 
+    cache.delete_many(f"dashboard:{req['user_id']}")
     log_action(req["user_id"], "user", "deny_admin_access", details={"request_id": request_id})
 
     return jsonify({"message": "Access denied. Admin has been notified."}), 200
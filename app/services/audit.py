@@ -1,10 +1,71 @@
+import atexit
+import queue
+import threading
 from datetime import datetime
 from app import mongo
 from flask import request as flask_request
 
+# Flush whenever this many entries are buffered or this long has passed
+MAX_BATCH_SIZE = 500
+FLUSH_INTERVAL_S = 0.1
+
+
+class AuditWriter:
+    """
+    Buffers audit log entries in memory and writes them with insert_many
+    from a daemon thread, so request handlers only pay for a queue put.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._app = None
+
+    def init_app(self, app):
+        self._app = app
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def put(self, entry: dict):
+        self._queue.put_nowait(entry)
+
+    def _drain(self, block: bool):
+        """Collect up to MAX_BATCH_SIZE entries, waiting at most FLUSH_INTERVAL_S for the first."""
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=FLUSH_INTERVAL_S) if block else self._queue.get_nowait())
+            while len(batch) < MAX_BATCH_SIZE:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write(self, batch):
+        try:
+            mongo.db.audit_logs.insert_many(batch, ordered=False)
+        except Exception as e:
+            self._app.logger.error(f"Audit log write failed ({len(batch)} entries): {e}")
+
+    def _run(self):
+        while True:
+            batch = self._drain(block=True)
+            if batch:
+                self._write(batch)
+
+    def flush(self):
+        """Write out everything still buffered (called at interpreter exit)."""
+        while batch := self._drain(block=False):
+            self._write(batch)
+
+
+audit_writer = AuditWriter()
+
 
 def log_action(actor_id: str, actor_role: str, action: str, target_user_id: str = None, details: dict = None):
     """Log any significant action in the system."""
+    # Request data must be read here; the writer thread has no request context
     log_entry = {
         "actor_id": actor_id,
         "actor_role": actor_role,  # "user" or "admin"
@@ -15,4 +76,4 @@ def log_action(actor_id: str, actor_role: str, action: str, target_user_id: str
         "user_agent": flask_request.headers.get("User-Agent", "unknown"),
         "timestamp": datetime.utcnow()
     }
-    mongo.db.audit_logs.insert_one(log_entry)
+    audit_writer.put(log_entry)
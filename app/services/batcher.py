@@ -0,0 +1,79 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class AdaptiveBatcher:
+    """
+    Fuse concurrent single-row predictions into one model call.
+    Requests are queued and a background worker drains up to max_batch_size
+    items before calling predict_fn once. A lone request is flushed at once;
+    the worker only waits (at most max_wait_ms) for callers already submitting.
+    """
+
+    def __init__(self, predict_fn, max_batch_size: int = 32, max_wait_ms: float = 10):
+        self.predict_fn = predict_fn  # (N, k) array -> sequence of N results
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        self._pending = 0  # Submitted rows not yet taken by the worker
+        self._pending_lock = threading.Lock()
+
+    def _ensure_worker(self):
+        # Started lazily so each gunicorn worker process gets its own thread after fork
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, daemon=True)
+                    self._worker.start()
+
+    def predict(self, features):
+        """Submit one feature row and block until its result is ready."""
+        self._ensure_worker()
+        future = Future()
+        with self._pending_lock:
+            self._pending += 1
+        self._queue.put((features, future))
+        return future.result()
+
+    def _take(self, item, items):
+        items.append(item)
+        with self._pending_lock:
+            self._pending -= 1
+
+    def _run(self):
+        while True:
+            items = []
+            self._take(self._queue.get(), items)
+            deadline = time.monotonic() + self.max_wait
+
+            while len(items) < self.max_batch_size:
+                try:
+                    self._take(self._queue.get_nowait(), items)
+                    continue
+                except queue.Empty:
+                    pass
+                # Queue is drained; wait only for callers that are mid-submit
+                remaining = deadline - time.monotonic()
+                if self._pending <= 0 or remaining <= 0:
+                    break
+                try:
+                    self._take(self._queue.get(timeout=remaining), items)
+                except queue.Empty:
+                    break
+
+            try:
+                batch = np.vstack([features for features, _ in items])
+                results = self.predict_fn(batch)
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(items, results):
+                future.set_result(result)
@@ -0,0 +1,86 @@
+import redis
+from functools import wraps
+from flask import current_app, Response
+
+# Spending-analysis windows (days) that get cached. Other windows are computed
+# uncached, which keeps the key set per user fixed and lets invalidation
+# delete exact keys instead of scanning the keyspace.
+SPENDING_CACHE_WINDOWS = (7, 30, 90, 180, 365)
+
+
+class Cache:
+    """
+    Thin Redis read-through cache for JSON GET responses.
+    Disabled (every call is a miss / no-op) when REDIS_URL is not configured.
+    """
+
+    def __init__(self):
+        self.client = None
+
+    def init_app(self, app):
+        url = app.config.get("REDIS_URL")
+        timeout = app.config.get("REDIS_SOCKET_TIMEOUT", 0.2)
+        self.client = redis.Redis.from_url(
+            url, socket_timeout=timeout, socket_connect_timeout=timeout
+        ) if url else None
+
+    def get(self, key):
+        if not self.client:
+            return None
+        try:
+            return self.client.get(key)
+        except redis.RedisError as e:
+            current_app.logger.error(f"Cache get failed: {e}")
+            return None
+
+    def set(self, key, value, ttl):
+        if not self.client:
+            return
+        try:
+            self.client.setex(key, ttl, value)
+        except redis.RedisError as e:
+            current_app.logger.error(f"Cache set failed: {e}")
+
+    def delete_many(self, *keys):
+        if not self.client:
+            return
+        try:
+            self.client.delete(*keys)
+        except redis.RedisError as e:
+            current_app.logger.error(f"Cache delete failed: {e}")
+
+    def invalidate_user(self, user_id: str):
+        """Drop every cached view derived from this user's account or transactions."""
+        self.delete_many(
+            f"profile:{user_id}",
+            f"dashboard:{user_id}",
+            f"credit:{user_id}",
+            *(f"spending:{user_id}:{days}" for days in SPENDING_CACHE_WINDOWS)
+        )
+
+
+cache = Cache()
+
+
+def cached(key_fn, ttl: int):
+    """
+    Cache a view's 200 JSON response under key_fn() for ttl seconds.
+    Apply below @jwt_required() so key_fn can read the JWT identity.
+    key_fn may return None to bypass the cache for this request.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = key_fn()
+            if key is None:
+                return fn(*args, **kwargs)
+            body = cache.get(key)
+            if body is not None:
+                return Response(body, mimetype="application/json")
+
+            response = current_app.make_response(fn(*args, **kwargs))
+            if response.status_code == 200:
+                cache.set(key, response.get_data(), ttl)
+            return response
+        return wrapper
+    return decorator
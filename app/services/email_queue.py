@@ -0,0 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+
+# SMTP round trips are slow; send mail off the request thread
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="mail")
+
+
+def enqueue(fn, *args, **kwargs):
+    """Run fn(*args, **kwargs) in the background inside an app context."""
+    app = current_app._get_current_object()
+
+    def run():
+        with app.app_context():
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                app.logger.error(f"Email send failed: {e}")
+
+    _executor.submit(run)
@@ -1,6 +1,14 @@
 import jwt
 import datetime
+import time
 from flask import current_app
+from app.services.ttl_cache import TTLCache
+
+# Decoded permission tokens: token -> payload, or None for rejected tokens
+_verified = TTLCache(maxsize=4096, ttl=60)
+# Rejected tokens are remembered briefly so replays skip the HMAC check
+_REJECTED_TTL_S = 5
+_MISSING = object()
 
 
 def generate_permission_token(admin_id: str, user_id: str, request_id: str) -> str:
@@ -18,10 +26,19 @@ def generate_permission_token(admin_id: str, user_id: str, request_id: str) -> s
 
 def verify_permission_token(token: str) -> dict | None:
     """Verify and decode a permission token. Returns payload or None."""
+    cached = _verified.get(token, _MISSING)
+    if cached is not _MISSING:
+        return cached
+
     try:
         payload = jwt.decode(token, current_app.config["PERMISSION_SECRET"], algorithms=["HS256"])
-        return payload
     except jwt.ExpiredSignatureError:
+        _verified.set(token, None, _REJECTED_TTL_S)
         return None
     except jwt.InvalidTokenError:
+        _verified.set(token, None, _REJECTED_TTL_S)
         return None
+
+    # Never serve a cached payload past the token's own exp
+    _verified.set(token, payload, min(_verified.ttl, payload["exp"] - time.time()))
+    return payload
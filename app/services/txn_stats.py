@@ -0,0 +1,17 @@
+from datetime import datetime
+from flask import g
+from app import mongo
+
+
+def txn_count_today(user_id: str, now: datetime) -> int:
+    """Number of the user's transactions since midnight UTC, computed once per request."""
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    counts = g.setdefault("txn_count_today", {})
+    key = (user_id, today_start)
+    if key not in counts:
+        # The (user_id, timestamp, _id) index covers this count; no hint, so a
+        # missing or renamed index degrades to a slower scan instead of an error
+        counts[key] = mongo.db.transactions.count_documents(
+            {"user_id": user_id, "timestamp": {"$gte": today_start}}
+        )
+    return counts[key]
@@ -1,3 +1,6 @@
 workers = 4
+# Threaded workers let bcrypt (which releases the GIL) and Mongo I/O overlap within a worker
+worker_class = "gthread"
+threads = 4
 bind = "0.0.0.0:10000"
 timeout = 120
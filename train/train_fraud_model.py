@@ -11,31 +11,31 @@ import pandas as pd
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import Pipeline
-import pickle
+import joblib
 import os
 
 # ─────────────────────────────────────────────
 # Generate Synthetic Training Data
 # ─────────────────────────────────────────────
 
-np.random.seed(42)
+rng = np.random.default_rng(42)
 N_NORMAL = 2000
 N_FRAUD = 200
 
 # Normal transactions
 normal_data = {
-    "amount": np.random.lognormal(mean=7, sigma=1, size=N_NORMAL),       # ~₹1000 avg
-    "hour": np.random.choice(range(8, 22), size=N_NORMAL),                # Business hours
-    "balance_before": np.random.uniform(5000, 100000, size=N_NORMAL),
-    "transaction_count_today": np.random.randint(1, 8, size=N_NORMAL)
+    "amount": rng.lognormal(mean=7, sigma=1, size=N_NORMAL),              # ~₹1000 avg
+    "hour": rng.integers(8, 22, size=N_NORMAL),                           # Business hours
+    "balance_before": rng.uniform(5000, 100000, size=N_NORMAL),
+    "transaction_count_today": rng.integers(1, 8, size=N_NORMAL)
 }
 
 # Fraudulent transactions (unusual patterns)
 fraud_data = {
-    "amount": np.random.uniform(50000, 500000, size=N_FRAUD),             # Very high amounts
-    "hour": np.random.choice(range(0, 5), size=N_FRAUD),                  # Late night
-    "balance_before": np.random.uniform(100, 5000, size=N_FRAUD),         # Low balance
-    "transaction_count_today": np.random.randint(15, 30, size=N_FRAUD)   # Too many txns
+    "amount": rng.uniform(50000, 500000, size=N_FRAUD),                   # Very high amounts
+    "hour": rng.integers(0, 5, size=N_FRAUD),                             # Late night
+    "balance_before": rng.uniform(100, 5000, size=N_FRAUD),               # Low balance
+    "transaction_count_today": rng.integers(15, 30, size=N_FRAUD)         # Too many txns
 }
 
 # Combine
@@ -56,7 +56,8 @@ model = Pipeline([
     ("clf", IsolationForest(
         n_estimators=100,
         contamination=0.09,  # ~9% fraud rate
-        random_state=42
+        random_state=42,
+        n_jobs=-1            # Build trees on all cores
     ))
 ])
 
@@ -67,11 +68,30 @@ model.fit(X)
 # ─────────────────────────────────────────────
 
 save_path = os.path.join(os.path.dirname(__file__), "../app/ml_models/fraud_model.pkl")
-with open(save_path, "wb") as f:
-    pickle.dump(model, f)
+# Compressed: unpickling copies every tree into process memory anyway, so mmap_mode would gain nothing
+joblib.dump(model, save_path, compress=3)
 
 print(f"✅ Fraud detection model saved to {save_path}")
 
+# Optional ONNX export; the app serves it through onnxruntime when both are installed
+onnx_path = os.path.join(os.path.dirname(__file__), "../app/ml_models/fraud_model.onnx")
+try:
+    from skl2onnx import to_onnx
+
+    onx = to_onnx(model, X[:1].astype(np.float32), target_opset={"": 17, "ai.onnx.ml": 3})
+    with open(onnx_path, "wb") as f:
+        f.write(onx.SerializeToString())
+    print(f"✅ ONNX export saved to {onnx_path}")
+except Exception as e:
+    if isinstance(e, ImportError):
+        print("skl2onnx not installed; skipping ONNX export")
+    else:
+        print(f"⚠️ ONNX export failed ({e}); skipping it")
+    # A stale export from an earlier run would otherwise keep being served instead of this model
+    if os.path.exists(onnx_path):
+        os.remove(onnx_path)
+        print(f"Removed stale {onnx_path}")
+
 # ─────────────────────────────────────────────
 # Quick Test
 # ─────────────────────────────────────────────
@@ -7,62 +7,145 @@ Usage:
 """
 
 import numpy as np
-import pandas as pd
 from sklearn.linear_model import LogisticRegression
-from sklearn.preprocessing import StandardScaler
-from sklearn.pipeline import Pipeline
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report
-import pickle
+from sklearn.metrics import classification_report, roc_auc_score
+import joblib
 import os
 
-np.random.seed(42)
-N = 1500
+try:
+    from numba import njit, prange
+    _NUMBA = True
+except ImportError:
+    _NUMBA = False
+
+# Set VERBOSE=0 to skip the held-out evaluation report (e.g. for scheduled retrains)
+VERBOSE = os.environ.get("VERBOSE", "1") == "1"
+
+rng = np.random.default_rng(42)
+N_TRAIN = 1200
+N_TEST = 300
+
+# Feature columns of X, in the order app/ml_models/loan_eligibility.py builds them
+AB, AGE, TX, REQ = 0, 1, 2, 3  # average_balance, account_age_days, monthly_transaction_count, requested_amount
+
+# Per-column sampling range [low, high)
+LOWS = np.array([1000, 10, 0, 10000], dtype=np.float32)
+HIGHS = np.array([200000, 1500, 50, 500000], dtype=np.float32)
+
+
+def generate_applicants(n: int) -> np.ndarray:
+    """
+    n synthetic applicants as one contiguous (n, 4) float32 matrix: one uniform
+    draw for every cell, then a per-column affine map onto [low, high).
+    """
+    X = rng.random((n, 4), dtype=np.float32)
+    X *= HIGHS - LOWS
+    X += LOWS
+    counts = X[:, AGE:TX + 1]  # Adjacent columns, so this is a view; day and transaction counts are integers
+    np.floor(counts, out=counts)
+    return X
+
+
+# ─────────────────────────────────────────────
+# Eligibility rules that generate the labels
+# ─────────────────────────────────────────────
+
+LABEL_BLOCK = 16384  # Rows per block; keeps each block's temporaries cache-resident
 
-# Generate synthetic applicant data
-data = {
-    "average_balance": np.random.uniform(1000, 200000, N),
-    "account_age_days": np.random.randint(10, 1500, N),
-    "monthly_transaction_count": np.random.randint(0, 50, N),
-    "requested_amount": np.random.uniform(10000, 500000, N),
-}
 
-df = pd.DataFrame(data)
+def _label_numpy(ab, age, tx, req):
+    """Evaluate the rules block by block, ANDing into the output in place."""
+    out = np.empty(ab.shape[0], dtype=np.bool_)
+    for start in range(0, ab.shape[0], LABEL_BLOCK):
+        rows = slice(start, start + LABEL_BLOCK)
+        block = out[rows]
+        np.greater_equal(age[rows], 60, out=block)   # Account at least two months old
+        block &= ab[rows] >= req[rows] * 0.1          # Balance covers 10% of the request
+        block &= tx[rows] >= 3                        # Some monthly activity
+        block &= req[rows] <= ab[rows] * 8            # Request at most 8x the balance
+    return out.view(np.int8)
 
-# Define eligibility rules to generate labels
-def is_eligible(row):
-    if row["account_age_days"] < 60:
-        return 0
-    if row["average_balance"] < row["requested_amount"] * 0.1:
-        return 0
-    if row["monthly_transaction_count"] < 3:
-        return 0
-    if row["requested_amount"] > row["average_balance"] * 8:
-        return 0
-    return 1
 
-df["eligible"] = df.apply(is_eligible, axis=1)
+if _NUMBA:
+    _TEN_PCT = np.float32(0.1)  # Keep the products in float32, as NumPy does
 
-X = df[["average_balance", "account_age_days", "monthly_transaction_count", "requested_amount"]].values
-y = df["eligible"].values
+    @njit(parallel=True, cache=True)
+    def _label_numba(ab, age, tx, req, out):
+        """Same rules fused into one parallel pass, without boolean temporaries."""
+        for i in prange(ab.shape[0]):
+            out[i] = (age[i] >= 60) and (ab[i] >= req[i] * _TEN_PCT) and (tx[i] >= 3) and (req[i] <= ab[i] * 8)
+
+
+def label_eligibility(X: np.ndarray) -> np.ndarray:
+    """int8 eligibility label per row of X. Uses numba when installed."""
+    columns = X[:, AB], X[:, AGE], X[:, TX], X[:, REQ]
+    if _NUMBA:
+        out = np.empty(X.shape[0], dtype=np.int8)
+        _label_numba(*columns, out)
+        return out
+    return _label_numpy(*columns)
+
+
+# Rows are i.i.d. draws, so the held-out set is simply drawn separately; no split copy
+X_train = generate_applicants(N_TRAIN)
+X_test = generate_applicants(N_TEST)
+y_train = label_eligibility(X_train)
+y_test = label_eligibility(X_test)
+
+
+def choose_solver(n_samples: int, n_features: int, penalty: str = "l2") -> str:
+    """Pick the LogisticRegression solver that fits fastest for this problem shape."""
+    if penalty == "l2" and n_samples < 10_000:
+        return "liblinear"        # Coordinate descent; least overhead on small data
+    if penalty == "l2" and n_features <= 100:
+        return "newton-cholesky"  # Factors the tiny (d x d) Hessian directly
+    return "saga"                 # Large or sparse problems, and L1 penalties
 
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
 print("Training Logistic Regression model for loan eligibility...")
 
-model = Pipeline([
-    ("scaler", StandardScaler()),
-    ("clf", LogisticRegression(random_state=42, max_iter=1000))
-])
+# Standardize by hand instead of through a StandardScaler/Pipeline; the saved
+# model is just these statistics plus the linear weights
+mean = X_train.mean(axis=0, dtype=np.float64)
+scale = X_train.std(axis=0, dtype=np.float64)
+scale[scale == 0] = 1.0  # Same guard StandardScaler applies to constant columns
+
+
+def standardize(X: np.ndarray) -> np.ndarray:
+    """
+    (X - mean) / scale as one new C-contiguous float64 array, so LogisticRegression's
+    input validation doesn't add another copy. liblinear still copies X into its own
+    sparse node arrays inside fit; the lbfgs/newton/saga solvers use it as is.
+    """
+    out = np.subtract(X, mean, dtype=np.float64)
+    out /= scale
+    return out
 
-model.fit(X_train, y_train)
 
-print("\nModel Performance:")
-print(classification_report(y_test, model.predict(X_test)))
+clf = LogisticRegression(
+    solver=choose_solver(*X_train.shape),
+    random_state=42,
+    max_iter=200
+)
+clf.fit(standardize(X_train), y_train)
 
-# Save model
+if VERBOSE:
+    # One forward pass; labels and AUC both come from the decision values
+    scores = clf.decision_function(standardize(X_test))
+    print("\nModel Performance:")
+    print(classification_report(y_test, (scores > 0).astype(np.int8)))
+    print(f"ROC AUC: {roc_auc_score(y_test, scores):.3f}")
+
+# Save model: LoanModel in app/ml_models/loan_eligibility.py scores sigmoid(((x - mean) / scale) @ coef + intercept)
+# float32 matches the training data; float16 would overflow the balance/amount means
+model = {
+    "mean": mean.astype(np.float32),
+    "scale": scale.astype(np.float32),
+    "coef": clf.coef_[0].astype(np.float32),
+    "intercept": float(clf.intercept_[0])
+}
 save_path = os.path.join(os.path.dirname(__file__), "../app/ml_models/loan_model.pkl")
-with open(save_path, "wb") as f:
-    pickle.dump(model, f)
+# zlib level 3; the model is a few small arrays, so there's nothing to gain from mmap loading
+joblib.dump(model, save_path, compress=3)
 
 print(f"✅ Loan eligibility model saved to {save_path}")